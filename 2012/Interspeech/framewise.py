@@ -0,0 +1,214 @@
+# encoding: utf-8
+
+# Copyright 2012 Herve BREDIN (bredin@limsi.fr)
+
+"""
+    Frame-wise estimated global error rate
+
+    EstimatedGlobalErrorRate is computed on annotated frames only.
+    FrameCounts stores cumulative per-frame counts (number of reference
+    persons, of hypothesized persons, of correctly named persons and of
+    errors) so that the error rate of any time window can be obtained with
+    two lookups instead of cropping and evaluating again.
+
+    A person is in a frame as soon as one of its segments overlaps the frame
+    (same as 'loose' cropping). Anonymous persons (Unknown, Inconnu_xxx or
+    speaker#N) are left out of both reference and hypothesis, as they cannot
+    be named. Summed over whole videos, these counts must reproduce
+    EstimatedGlobalErrorRate: `python regression.py --mode framewise` checks
+    that they reproduce Tables 3 and 4 of OUTPUT.txt (see run_windows.py).
+
+"""
+
+import numpy as np
+from pyannote.base.annotation import Unknown
+
+# columns of per-frame counts
+REFERENCE, HYPOTHESIS, CORRECT, ERROR = range(4)
+
+# prefixes of anonymous labels in groundtruth and speaker identification
+ANONYMOUS = ('Inconnu_', 'speaker#')
+
+
+def is_named(label):
+    """False for anonymous labels (Unknown, Inconnu_xxx or speaker#N)"""
+    if isinstance(label, Unknown):
+        return False
+    return not (isinstance(label, basestring) and label.startswith(ANONYMOUS))
+
+
+def segments(annotation):
+    """List of (start, end, label) tuples of an annotation"""
+    return [(segment.start, segment.end, label) \
+            for label in annotation.labels() \
+            for segment in annotation([label]).timeline]
+
+
+def named_segments(annotation):
+    """List of (start, end, label) tuples of named labels of an annotation"""
+    return [(start, end, label) for start, end, label in segments(annotation) \
+            if is_named(label)]
+
+
+def overlap(A, B):
+    """(len(A) x len(B)) matrix of overlap duration between segments
+
+    A and B are lists of (start, end, ...) tuples.
+    """
+    A = np.array([a[:2] for a in A], dtype=float).reshape((-1, 2))
+    B = np.array([b[:2] for b in B], dtype=float).reshape((-1, 2))
+    start = np.maximum(A[:, 0][:, np.newaxis], B[:, 0][np.newaxis, :])
+    end = np.minimum(A[:, 1][:, np.newaxis], B[:, 1][np.newaxis, :])
+    return np.maximum(0., end - start)
+
+
+def indicator(frames, segments, labels):
+    """(frames x labels) indicator of labels present in each frame
+
+    Parameters
+    ----------
+    frames : list
+        (start, end) of each frame.
+    segments : list
+        (start, end, label) of each segment.
+    labels : dict
+        labels[label] is the column index of label.
+        Segments whose label is not in labels are ignored.
+
+    """
+    # (segments x labels) one-hot labels
+    onehot = np.zeros((len(segments), len(labels)), dtype=float)
+    for s, (_, _, label) in enumerate(segments):
+        if label in labels:
+            onehot[s, labels[label]] = 1.
+    return np.dot(overlap(frames, segments) > 0, onehot) > 0
+
+
+def frame_counts(reference, hypothesis):
+    """Count persons in each frame
+
+    Parameters
+    ----------
+    reference : (frames x labels) boolean array
+        Named persons in reference (anonymous persons must be left out).
+    hypothesis : (... x frames x labels) boolean array
+        Named persons in hypothesis (anonymous persons must be left out).
+
+    Returns
+    -------
+    counts : (... x frames x 4) array
+        (reference, hypothesis, correct, error) counts, where error is the
+        total number of confusions, false alarms and misses.
+
+    """
+    n_reference = reference.sum(axis=-1)
+    n_hypothesis = hypothesis.sum(axis=-1)
+    n_correct = (hypothesis & reference).sum(axis=-1)
+    n_error = np.maximum(n_reference, n_hypothesis) - n_correct
+    n_reference = np.broadcast_to(n_reference, n_hypothesis.shape)
+    return np.stack([n_reference, n_hypothesis, n_correct, n_error], axis=-1)
+
+
+def rates(counts):
+    """Compute EGER, precision, recall and F1-measure from counts
+
+    Parameters
+    ----------
+    counts : array-like
+        (reference, hypothesis, correct, error) counts, or (... x 4) array
+        of such counts, in which case rates are computed for each row.
+
+    Returns
+    -------
+    eger, precision, recall, f_measure : floats or arrays
+
+    """
+    counts = np.asarray(counts, dtype=float)
+    reference = counts[..., REFERENCE]
+    hypothesis = counts[..., HYPOTHESIS]
+    correct = counts[..., CORRECT]
+    error = counts[..., ERROR]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        eger = np.where(reference > 0, error / reference, 0.)
+        precision = np.where(hypothesis > 0, correct / hypothesis, 0.)
+        recall = np.where(reference > 0, correct / reference, 0.)
+        f_measure = np.where(precision + recall > 0, \
+                             2 * precision * recall / (precision + recall), \
+                             0.)
+    if counts.ndim == 1:
+        return float(eger), float(precision), float(recall), float(f_measure)
+    return eger, precision, recall, f_measure
+
+
+class FrameCounts(object):
+    """Cumulative per-frame counts
+
+    Parameters
+    ----------
+    reference : Annotation
+        Groundtruth (e.g. manual speaker identification).
+    hypothesis : Annotation
+        Output of name propagation.
+    annotated : Timeline
+        Annotated frames.
+
+    Usage
+    -----
+    Counts for frames whose middle lies in [start, end)::
+
+        >>> counts = FrameCounts(msi, s, annotated=af)
+        >>> counts(start, end)
+
+    Counts of several FrameCounts (e.g. one per video) can be summed before
+    being converted into error rates with `rates`.
+
+    """
+
+    def __init__(self, reference, hypothesis, annotated=None):
+        super(FrameCounts, self).__init__()
+
+        frames = [(frame.start, frame.end) for frame in annotated]
+        reference = named_segments(reference)
+        hypothesis = named_segments(hypothesis)
+
+        labels = sorted(set([label for _, _, label in reference + hypothesis]))
+        labels = {label: l for l, label in enumerate(labels)}
+
+        counts = frame_counts(indicator(frames, reference, labels), \
+                              indicator(frames, hypothesis, labels))
+        counts = counts.reshape((-1, 4))
+
+        # sort frames chronologically
+        times = np.array([.5 * (start + end) for start, end in frames], \
+                         dtype=float)
+        order = np.argsort(times, kind='mergesort')
+        self.times = times[order]
+
+        # cumulative[i] is the sum of counts of the first i frames
+        self.cumulative = np.zeros((len(times)+1, 4), dtype=int)
+        self.cumulative[1:] = np.cumsum(counts[order], axis=0)
+
+    def __call__(self, start=None, end=None):
+        """(reference, hypothesis, correct, error) counts in [start, end)"""
+        i = 0 if start is None else np.searchsorted(self.times, start, 'left')
+        j = len(self.times) if end is None else \
+            np.searchsorted(self.times, end, 'left')
+        return self.cumulative[max(i, j)] - self.cumulative[i]
+
+    def windows(self, starts, ends):
+        """Counts in many windows at once
+
+        Parameters
+        ----------
+        starts, ends : (N, ) array-like
+            Window boundaries.
+
+        Returns
+        -------
+        counts : (N x 4) array
+            counts[n] contains counts in [starts[n], ends[n]).
+
+        """
+        i = np.searchsorted(self.times, starts, 'left')
+        j = np.maximum(i, np.searchsorted(self.times, ends, 'left'))
+        return self.cumulative[j] - self.cumulative[i]
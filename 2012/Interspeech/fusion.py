@@ -0,0 +1,175 @@
+# encoding: utf-8
+
+# Copyright 2012 Herve BREDIN (bredin@limsi.fr)
+
+"""
+    Score-level fusion of speaker identification and overlaid names
+
+    'M3 + SID' tags speaker identification (SID) output with overlaid names
+    using hard decisions. Here, every source of evidence is stored as a
+    (segments x names) matrix, so that many weightings and decision
+    thresholds are scored at once with a few array operations:
+
+    - SID scores of each segment against each speaker model,
+    - direct co-occurrence of each segment with each overlaid name,
+    - one-to-many co-occurrence (TF-IDF) of each SID cluster with each
+      overlaid name, propagated to the segments of the cluster.
+
+    Segments are (start, end, label, score) tuples (see framewise.segments)
+    and decisions are scored with frame-wise counts (see framewise.py).
+
+"""
+
+import numpy as np
+
+from framewise import is_named, overlap, indicator, frame_counts
+
+# indices of evidence matrices
+SID, DIRECT, ONE_TO_MANY = range(3)
+
+
+def evidence(sid, on, vocabulary):
+    """Stack SID, direct and one-to-many evidence
+
+    Parameters
+    ----------
+    sid : list
+        Speaker identification segments (start, end, label, score) of one
+        video. Anonymous labels (e.g. Inconnu_001) are clusters without
+        speaker model.
+    on : list
+        Overlaid names segments (start, end, label) of the same video.
+    vocabulary : dict
+        vocabulary[name] is the column index of name.
+
+    Returns
+    -------
+    evidence : (3 x segments x names) array
+        evidence[SID], evidence[DIRECT] and evidence[ONE_TO_MANY]
+
+    """
+
+    S, V = len(sid), len(vocabulary)
+    E = np.zeros((3, S, V), dtype=float)
+
+    # -- SID scores against speaker models
+    for s, (_, _, label, score) in enumerate(sid):
+        if is_named(label) and label in vocabulary:
+            E[SID, s, vocabulary[label]] = score
+
+    # names detected in this video
+    on = [(start, end, name) for start, end, name in on \
+          if name in vocabulary]
+    if S == 0 or not on:
+        return E
+
+    # (overlaid names segments x names) indicator
+    N = np.zeros((len(on), V), dtype=float)
+    for o, (_, _, name) in enumerate(on):
+        N[o, vocabulary[name]] = 1.
+
+    # (segments x names) co-occurrence duration
+    cooccurrence = np.dot(overlap(sid, on), N)
+
+    # -- direct: ratio of segment during which name is displayed
+    duration = np.array([end - start for start, end, _, _ in sid], \
+                        dtype=float)
+    E[DIRECT] = np.minimum(1., cooccurrence / \
+                               np.maximum(duration, 1e-6)[:, np.newaxis])
+
+    # -- one-to-many: TF-IDF co-occurrence between clusters and names
+    clusters = sorted(set([label for _, _, label, _ in sid]))
+    index = {cluster: c for c, cluster in enumerate(clusters)}
+    G = np.zeros((S, len(clusters)), dtype=float)
+    for s, (_, _, label, _) in enumerate(sid):
+        G[s, index[label]] = 1.
+    K = np.dot(G.T, cooccurrence)
+    tf = K / np.maximum(K.sum(axis=1), 1e-6)[:, np.newaxis]
+    df = np.maximum((K > 0).sum(axis=0), 1)
+    idf = np.log(float(len(clusters)) / df)
+    E[ONE_TO_MANY] = np.dot(G, tf * idf)
+
+    return E
+
+
+def decide(E, weights, thresholds):
+    """Fused decisions for every weighting and threshold
+
+    Parameters
+    ----------
+    E : (3 x segments x names) array
+        Evidence
+    weights : (W x 3) array-like
+        Weights of SID, direct and one-to-many evidence.
+    thresholds : (T, ) array-like
+        Minimum fused score for a segment to be named.
+
+    Returns
+    -------
+    labels : (W x segments) array
+        Index of best name for each segment.
+    named : (W x T x segments) boolean array
+        Whether segment is named.
+
+    """
+    weights = np.asarray(weights, dtype=float)
+    thresholds = np.asarray(thresholds, dtype=float)
+    scores = np.tensordot(weights, E, axes=(1, 0))
+    labels = np.argmax(scores, axis=2)
+    best = np.max(scores, axis=2)
+    named = (best[:, np.newaxis, :] > 0) & \
+            (best[:, np.newaxis, :] >= thresholds[np.newaxis, :, np.newaxis])
+    return labels, named
+
+
+def evaluate(sid, labels, named, reference, frames, vocabulary):
+    """Counts for every weighting and threshold
+
+    Parameters
+    ----------
+    sid : list
+        Speaker identification segments (start, end, label, score).
+    labels, named : arrays
+        As returned by `decide`.
+    reference : list
+        Groundtruth segments (start, end, label). Anonymous persons (e.g.
+        speaker#1) are left out, as in FrameCounts.
+    frames : list
+        Annotated frames (start, end).
+    vocabulary : dict
+        vocabulary[name] is the column index of name.
+
+    Returns
+    -------
+    counts : (W x T x 4) array
+        (reference, hypothesis, correct, error) counts summed over frames.
+
+    """
+
+    W, T, S = named.shape
+    if not frames:
+        return np.zeros((W, T, 4), dtype=int)
+
+    reference = [(start, end, label) for start, end, label in reference \
+                 if is_named(label)]
+
+    # reference persons that cannot be hypothesized get extra columns
+    columns = dict(vocabulary)
+    for _, _, label in reference:
+        if label not in columns:
+            columns[label] = len(columns)
+
+    # (frames x columns) reference indicator
+    R = indicator(frames, reference, columns)
+
+    # (frames x segments) SID segments overlapping each frame
+    A = (overlap(frames, sid) > 0).astype(float)
+
+    # (W x segments x columns) one-hot fused labels
+    O = np.zeros((W, S, len(columns)), dtype=float)
+    O[np.arange(W)[:, np.newaxis], np.arange(S)[np.newaxis, :], labels] = 1.
+
+    # (W x T x frames x columns) hypothesis indicator
+    H = np.matmul(A, named[..., np.newaxis] * O[:, np.newaxis]) > 0
+
+    return frame_counts(R, H).sum(axis=2)
@@ -0,0 +1,369 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2012 Herve BREDIN (bredin@limsi.fr)
+
+"""
+   Unsupervised Speaker Identification using Overlaid Texts in TV Broadcast
+
+              Johann Poignant, Hervé Bredin, Viet Bac Le,
+           Laurent Besacier, Claude Barras and Georges Quénot.
+
+    This script checks that run.py still reproduces Tables 3, 4, 5 and 6
+    (as stored in OUTPUT.txt) and that it did not get slower or hungrier
+    than the wall time and peak memory stored in BASELINE.txt.
+
+    Every mode of run.py is run in turn, and every EGER, precision, recall
+    and F1-measure cell is compared to OUTPUT.txt. So are the full video
+    rows printed by run_windows.py, which checks that frame-wise counts
+    (framewise.py) reproduce EstimatedGlobalErrorRate::
+
+        >>> python regression.py
+
+    server.py is started on localhost as well, and its answers to
+    `/evaluate?method=M3&condition=standard` (and condition=full) are
+    compared to Table 5.
+
+    Wall time and peak memory are measured for each mode and compared to
+    BASELINE.txt. BASELINE.txt depends on the machine, hence is not part of
+    the repository: a mode without baseline fails. To (re)generate
+    BASELINE.txt on the current machine::
+
+        >>> python regression.py --update-baseline
+
+    Exit status is non-zero as soon as one mode crashes, one cell drifts by
+    more than the tolerance, or one mode is slower (or uses more memory)
+    than its baseline by more than the threshold.
+
+    Peak memory is obtained with os.wait4, hence this script only runs on
+    Unix (Linux and Mac OS X).
+
+"""
+
+import os
+import re
+import sys
+import json
+import time
+import socket
+import urllib2
+import tempfile
+import subprocess
+from argparse import ArgumentParser
+
+# =============================================================================
+# == CONFIGURATION ============================================================
+# =============================================================================
+
+# reference output
+OUTPUT = "OUTPUT.txt"
+
+# stored wall time and peak memory, one line per mode
+BASELINE = "BASELINE.txt"
+
+# modes that must reproduce OUTPUT.txt
+# (name, script, command line arguments, tables to compare)
+MODES = [('serial', 'run.py', [], [3, 4, 5, 6]),
+         ('batch', 'run.py', ['--batch'], [3, 4, 5, 6]),
+         ('framewise', 'run_windows.py', ['--method', 'SID', \
+                                          '--method', 'M1', \
+                                          '--method', 'M2', \
+                                          '--method', 'M3', \
+                                          '--method', 'M3 + SID'], [3, 4]),
+         ('server', 'server.py', [], [5]), ]
+
+# server.py requests that must reproduce Table 5
+# (condition, query)
+QUERIES = [('Standard', '/evaluate?method=M3&condition=standard'),
+           ('Full video', '/evaluate?method=M3&condition=full')]
+
+parser = ArgumentParser(description="Check that run.py reproduces %s." % \
+                                    OUTPUT)
+parser.add_argument('--tolerance', type=float, default=0.001, \
+                    help="maximum absolute difference per cell "
+                         "(default: %(default)s)")
+parser.add_argument('--threshold', type=float, default=0.2, \
+                    help="maximum relative slow-down w.r.t. baseline "
+                         "(default: %(default)s)")
+parser.add_argument('--memory-threshold', type=float, default=0.2, \
+                    help="maximum relative peak memory increase w.r.t. "
+                         "baseline (default: %(default)s)")
+parser.add_argument('--update-baseline', action='store_true', \
+                    help="store wall time and peak memory in %s" % BASELINE)
+parser.add_argument('--mode', action='append', \
+                    choices=[mode[0] for mode in MODES], \
+                    help="only check this mode (can be repeated)")
+args = parser.parse_args()
+
+# =============================================================================
+# == PARSE TABLES =============================================================
+# =============================================================================
+
+# caption of a table (e.g. "Table 3: Name propagation performance...")
+# progress bars (e.g. "Table 5: |#####|") are not captions
+CAPTION = re.compile(r'^Table (\d+):[^|]*$')
+
+def parse(lines):
+    """Parse pretty-printed tables
+
+    Returns
+    -------
+    cells : dict
+        cells[table, first column, second column] is the list of floats
+        [EGER, precision, recall, F1-measure] found in this row.
+
+    """
+    cells = {}
+    rows = []
+    for line in lines:
+        line = line.strip()
+        # table row
+        if line.startswith('|') and line.endswith('|'):
+            columns = [column.strip() for column in line[1:-1].split('|')]
+            try:
+                values = [float(column) for column in columns[2:]]
+            except ValueError:
+                # header row
+                continue
+            rows.append((columns[0], columns[1], values))
+            continue
+        # caption closes the table(s) printed since the previous caption
+        match = CAPTION.match(line)
+        if match:
+            table = int(match.group(1))
+            for first, second, values in rows:
+                cells[table, first, second] = values
+            rows = []
+    return cells
+
+def compare(reference, hypothesis, tolerance, tables):
+    """Return human-readable description of drifting cells of tables"""
+    columns = ['EGER', 'Precision', 'Recall', 'F1-Measure']
+    drifts = []
+    for key in sorted(reference):
+        if key[0] not in tables:
+            continue
+        if key not in hypothesis:
+            drifts.append("Table %d | %s | %s: missing" % key)
+            continue
+        for c, column in enumerate(columns):
+            expected = reference[key][c]
+            obtained = hypothesis[key][c]
+            if abs(expected - obtained) > tolerance:
+                drifts.append("Table %d | %s | %s | %s: " % (key + (column,))+
+                              "expected %.3f, obtained %.3f" % (expected, \
+                                                                obtained))
+    return drifts
+
+# =============================================================================
+# == RUN ======================================================================
+# =============================================================================
+
+def exit_status(status):
+    """Convert os.wait4 status to subprocess convention (-N for signal N)"""
+    if os.WIFSIGNALED(status):
+        return -os.WTERMSIG(status)
+    return os.WEXITSTATUS(status)
+
+def memory_usage(usage):
+    """Peak resident memory (in kilobytes) from os.wait4 resource usage"""
+    # ru_maxrss is in kilobytes on Linux, but in bytes on Mac OS X
+    if sys.platform == 'darwin':
+        return usage.ru_maxrss / 1024
+    return usage.ru_maxrss
+
+def run(script, arguments):
+    """Run script in a child process
+
+    Returns
+    -------
+    status : int
+        Exit status of script (-N if killed by signal N)
+    lines : list
+        Standard output of script
+    wall : float
+        Wall time in seconds
+    memory : int
+        Peak resident memory of the child process (in kilobytes)
+
+    """
+    command = [sys.executable, script] + arguments
+    stdout = tempfile.TemporaryFile()
+    start = time.time()
+    process = subprocess.Popen(command, stdout=stdout)
+    # os.wait4 gives the resource usage of this very child
+    # (unlike resource.getrusage(RUSAGE_CHILDREN) which accumulates)
+    _, status, usage = os.wait4(process.pid, 0)
+    wall = time.time() - start
+    stdout.seek(0)
+    lines = stdout.readlines()
+    stdout.close()
+    return exit_status(status), lines, wall, memory_usage(usage)
+
+def serve(script, arguments, queries):
+    """Start server on localhost, send queries and stop server
+
+    Returns
+    -------
+    status : int
+        Exit status of server if it stopped by itself, 0 otherwise
+    answers : list
+        JSON answer to each query (None if server answered with an error)
+    wall : float
+        Wall time in seconds, from start-up to last answer
+    memory : int
+        Peak resident memory of the server process (in kilobytes)
+
+    """
+    # free port on localhost
+    s = socket.socket()
+    s.bind(('127.0.0.1', 0))
+    port = s.getsockname()[1]
+    s.close()
+
+    command = [sys.executable, script, '--host', '127.0.0.1', \
+               '--port', str(port)] + arguments
+    devnull = open(os.devnull, 'w')
+    start = time.time()
+    process = subprocess.Popen(command, stdout=devnull)
+
+    answers = []
+    pid = 0
+    for query in queries:
+        while True:
+            try:
+                response = urllib2.urlopen('http://127.0.0.1:%d%s' % \
+                                           (port, query))
+                answers.append(json.load(response))
+                break
+            except urllib2.HTTPError:
+                answers.append(None)
+                break
+            except (urllib2.URLError, socket.error):
+                # server is still loading data and propagating names...
+                pid, status, usage = os.wait4(process.pid, os.WNOHANG)
+                if pid:
+                    break
+                time.sleep(1.)
+        # ... or it crashed
+        if pid:
+            break
+    wall = time.time() - start
+
+    if not pid:
+        process.terminate()
+        _, _, usage = os.wait4(process.pid, 0)
+        status = 0
+    devnull.close()
+    return exit_status(status), answers, wall, memory_usage(usage)
+
+def load_baseline(path):
+    baseline = {}
+    if not os.path.exists(path):
+        return baseline
+    f = open(path, "r")
+    for line in f.readlines():
+        if not line.strip() or line.startswith('#'):
+            continue
+        name, wall, memory = line.split()
+        baseline[name] = (float(wall), int(memory))
+    f.close()
+    return baseline
+
+def save_baseline(path, baseline):
+    f = open(path, "w")
+    f.write("# mode wall_time_in_seconds peak_memory_in_kilobytes\n")
+    for name in sorted(baseline):
+        f.write("%s %.3f %d\n" % ((name,) + baseline[name]))
+    f.close()
+
+# =============================================================================
+# == CHECK ====================================================================
+# =============================================================================
+
+f = open(OUTPUT, "r")
+reference = parse(f.readlines())
+f.close()
+
+baseline = load_baseline(BASELINE)
+
+failures = []
+
+for name, script, arguments, tables in MODES:
+
+    if args.mode and name not in args.mode:
+        continue
+
+    print "Running %s mode..." % name
+    if name == 'server':
+        status, answers, wall, memory = serve(script, arguments, \
+                                              [query for _, query in QUERIES])
+    else:
+        status, lines, wall, memory = run(script, arguments)
+
+    # --- crash
+    if status != 0:
+        print "    CRASHED  (exit status %d)" % status
+        failures.append("%s: crashed (exit status %d)" % (name, status))
+        continue
+
+    # --- correctness
+    if name == 'server':
+        cells = {}
+        for (condition, query), answer in zip(QUERIES, answers):
+            if answer is None:
+                continue
+            for speakers in ['All', 'No anchor']:
+                cells[5, speakers, condition] = \
+                    [answer[speakers][column] for column in \
+                     ['EGER', 'Precision', 'Recall', 'F1-Measure']]
+    else:
+        cells = parse(lines)
+    drifts = compare(reference, cells, args.tolerance, tables)
+    for drift in drifts:
+        print "    DRIFT    %s" % drift
+    failures.extend(["%s: %s" % (name, drift) for drift in drifts])
+
+    # --- performance
+    if name in baseline:
+        baseline_wall, baseline_memory = baseline[name]
+        print "    wall time   %8.1fs (baseline: %8.1fs)" % (wall, \
+                                                            baseline_wall)
+        print "    peak memory %8.1fMB (baseline: %8.1fMB)" % \
+              (memory/1024., baseline_memory/1024.)
+        if wall > (1. + args.threshold) * baseline_wall:
+            failures.append("%s: %.1fs is more than %d%% slower than "
+                            "baseline (%.1fs)" % (name, wall, \
+                                                  100*args.threshold, \
+                                                  baseline_wall))
+        if memory > (1. + args.memory_threshold) * baseline_memory:
+            failures.append("%s: %.1fMB is more than %d%% above baseline "
+                            "peak memory (%.1fMB)" % \
+                            (name, memory/1024., \
+                             100*args.memory_threshold, \
+                             baseline_memory/1024.))
+    else:
+        print "    wall time   %8.1fs (no baseline)" % wall
+        print "    peak memory %8.1fMB (no baseline)" % (memory/1024.)
+        if not args.update_baseline:
+            print "    WARNING  no baseline in %s " % BASELINE + \
+                  "(use --update-baseline to create it)"
+            failures.append("%s: no baseline in %s (use --update-baseline)" \
+                            % (name, BASELINE))
+
+    # a drifting mode is broken: its wall time and memory are meaningless
+    if args.update_baseline:
+        if drifts:
+            print "    baseline not updated (drifting cells)"
+        else:
+            baseline[name] = (wall, memory)
+
+if args.update_baseline:
+    save_baseline(BASELINE, baseline)
+
+print
+if failures:
+    for failure in failures:
+        print "FAILED %s" % failure
+    sys.exit(1)
+print "OK"
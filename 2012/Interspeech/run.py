@@ -18,6 +18,16 @@
      
         >>> python run.py
     
+    One-to-one name propagation (M1 and M2) inputs can also be tagged in a
+    pre-pass, with scipy's assignment solver (http://www.scipy.org)::
+    
+        >>> python run.py --batch
+    
+    Problems are still solved one at a time: the only gain is that the
+    same problem is not solved twice (e.g. for Tables 3 and 4). scipy may
+    break ties differently from HungarianTagger, so check the output with
+    `python regression.py --mode batch` before relying on it.
+    
 """
 
 # =============================================================================
@@ -46,6 +56,8 @@ except Exception, e:
 # == IMPORTS ==================================================================
 # =============================================================================
 
+from argparse import ArgumentParser
+
 # .uem, .mdtm and .repere files parsers
 from pyannote.parser import UEMParser, MDTMParser, REPEREParser
 
@@ -63,6 +75,11 @@ from progressbar import ProgressBar, Bar
 # used to pretty-print Tables 3, 4, 5 and 6
 from prettytable import PrettyTable
 
+parser = ArgumentParser(description="Generate Tables 3, 4, 5 and 6.")
+parser.add_argument('--batch', action='store_true', \
+                    help="tag one-to-one propagation inputs once, in a pre-pass")
+args = parser.parse_args()
+
 # =============================================================================
 # == LOAD DATA ================================================================
 # =============================================================================
@@ -120,7 +137,12 @@ auto_overlaid_names = REPEREParser("data/auto_overlaid_names.repere", \
 # 'sd' stands for (unsupervised) speaker diarization
 # 'sid' stands for (supervised) speaker identification
 
-one_to_one = HungarianTagger(cost=Cooccurrence)
+if args.batch:
+    # only --batch requires scipy
+    from tagging import BatchHungarianTagger
+    one_to_one = BatchHungarianTagger(cost=Cooccurrence)
+else:
+    one_to_one = HungarianTagger(cost=Cooccurrence)
 one_to_many = ArgMaxTagger(cost=CoTFIDF)
 direct = ConservativeDirectTagger()
 
@@ -151,6 +173,44 @@ print """
 =============================================================================
 """
 
+# =============================================================================
+# == BATCHED ONE-TO-ONE PROPAGATION ===========================================
+# =============================================================================
+
+# tag all one-to-one propagation inputs of Tables 3, 4, 5 and 6 once
+# (full condition, standard condition and perfect speaker diarization);
+# this is a plain loop, cached by annotation: loops below reuse these very
+# annotations, so that no problem is computed and solved twice.
+if args.batch:
+    
+    # batched['full'][video] = (on, sd)
+    # batched['standard'][video] = (on, sd, psd)
+    batched = {'full': {}, 'standard': {}}
+    pairs = []
+    
+    for video in videos:
+        
+        # extract standard condition
+        sc = standard_condition.timeline(video)
+        
+        # full condition
+        on = auto_overlaid_names.annotation(video, 'written')
+        sd = auto_speaker_diarization.annotation(video, 'speaker')
+        batched['full'][video] = (on, sd.anonymize())
+        pairs.append(batched['full'][video])
+        
+        # standard condition
+        on = on(sc, mode='loose')
+        sd = sd(sc, mode='loose')
+        # standard condition, perfect speaker diarization
+        msi = manual_speaker_identification.annotation(video, 'speaker')
+        psd = msi(sc, mode='loose').anonymize()
+        batched['standard'][video] = (on, sd.anonymize(), psd)
+        pairs.append((on, batched['standard'][video][1]))
+        pairs.append((on, psd))
+    
+    one_to_one.batch(pairs)
+
 # =============================================================================
 # == TABLES 3 & 4 =============================================================
 # =============================================================================
@@ -168,13 +228,18 @@ pb = ProgressBar(term_width=69, \
 
 for v, video in enumerate(videos):
     
-    # extract automatic speaker diarization for this video
-    sd = auto_speaker_diarization.annotation(video, 'speaker')
-    # anonymize labels (Unknown001, Unknown002, etc.)
-    sd = sd.anonymize()
+    if args.batch:
+        # reuse annotations of the batched pre-pass
+        on, sd = batched['full'][video]
     
-    # extract overlaid name detection for this video
-    on = auto_overlaid_names.annotation(video, 'written')
+    else:
+        # extract automatic speaker diarization for this video
+        sd = auto_speaker_diarization.annotation(video, 'speaker')
+        # anonymize labels (Unknown001, Unknown002, etc.)
+        sd = sd.anonymize()
+        
+        # extract overlaid name detection for this video
+        on = auto_overlaid_names.annotation(video, 'written')
     
     # extract automatic speaker identification for this video
     sid = auto_speaker_identification.annotation(video, 'speaker')
@@ -242,20 +307,25 @@ pb = ProgressBar(term_width=68, maxval=len(videos), \
 
 for v, video in enumerate(videos):
     
-    # extract standard condition
-    sc = standard_condition.timeline(video)
-    
-    # extract automatic speaker diarization for this video
-    sd = auto_speaker_diarization.annotation(video, 'speaker')
-    # focus on standard condition
-    sd = sd(sc, mode='loose')
-    # anonymize labels (Unknown001, Unknown002, etc.)
-    sd = sd.anonymize()
+    if args.batch:
+        # reuse annotations of the batched pre-pass
+        on, sd, _ = batched['standard'][video]
     
-    # extract overlaid name detection for this video
-    on = auto_overlaid_names.annotation(video, 'written')
-    # focus on standard condition
-    on = on(sc, mode='loose')
+    else:
+        # extract standard condition
+        sc = standard_condition.timeline(video)
+        
+        # extract automatic speaker diarization for this video
+        sd = auto_speaker_diarization.annotation(video, 'speaker')
+        # focus on standard condition
+        sd = sd(sc, mode='loose')
+        # anonymize labels (Unknown001, Unknown002, etc.)
+        sd = sd.anonymize()
+        
+        # extract overlaid name detection for this video
+        on = auto_overlaid_names.annotation(video, 'written')
+        # focus on standard condition
+        on = on(sc, mode='loose')
     
     # automatic speaker identification for this video
     sid = None # (not needed in this set of experiments)
@@ -311,10 +381,15 @@ for v, video in enumerate(videos):
     # extract standard condition
     sc = standard_condition.timeline(video)
 
-    # extract overlaid name detection for this video
-    on = auto_overlaid_names.annotation(video, 'written')
-    # focus on standard condition
-    on = on(sc, mode='loose')
+    if args.batch:
+        # reuse annotations of the batched pre-pass
+        on, sd, psd = batched['standard'][video]
+    
+    else:
+        # extract overlaid name detection for this video
+        on = auto_overlaid_names.annotation(video, 'written')
+        # focus on standard condition
+        on = on(sc, mode='loose')
 
     # automatic speaker identification for this video
     sid = None # (not needed in this set of experiments)
@@ -328,12 +403,15 @@ for v, video in enumerate(videos):
     af = annotated_frames.timeline(video)
     af = af(msi(anchors).timeline.gaps(af.extent()), mode='loose')
 
-    # extract automatic speaker diarization for this video
-    sd = auto_speaker_diarization.annotation(video, 'speaker')
-    # focus on standard condition
-    sd = sd(sc, mode='loose')
-    # anonymize labels (Unknown001, Unknown002, etc.)
-    sd = sd.anonymize()
+    if not args.batch:
+        # extract automatic speaker diarization for this video
+        sd = auto_speaker_diarization.annotation(video, 'speaker')
+        # focus on standard condition
+        sd = sd(sc, mode='loose')
+        # anonymize labels (Unknown001, Unknown002, etc.)
+        sd = sd.anonymize()
+        # perfect speaker diarization
+        psd = msi.anonymize()
     
     # --- perfect speaker diarization + perfect propagation
     # is equivalent to start from groundtruth and rename to Unknown 
@@ -344,7 +422,6 @@ for v, video in enumerate(videos):
     eger['Table 6']['Perfect']['Perfect'](msi, s, annotated=af)
     
     # --- perfect speaker diarization + M1 propagation
-    psd = msi.anonymize()
     s = M1(on, psd, sid)
     eger['Table 6']['Perfect']['M1'](msi, s, annotated=af)
     
@@ -0,0 +1,246 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2012 Herve BREDIN (bredin@limsi.fr)
+
+"""
+   Unsupervised Speaker Identification using Overlaid Texts in TV Broadcast
+
+              Johann Poignant, Hervé Bredin, Viet Bac Le,
+           Laurent Besacier, Claude Barras and Georges Quénot.
+
+    This script relies on PyAnnote available at
+    http://packages.python.org/PyAnnote
+
+    This script explores score-level fusion of supervised speaker
+    identification (SID) and overlaid names, as an alternative to the
+    'M3 + SID' combination of Table 4::
+
+        >>> python run_fusion.py
+
+    SID scores against the speaker models of data/sid_models.lst and
+    co-occurrence with overlaid names are stored as (segments x names)
+    matrices: all weightings and thresholds are evaluated at once, without
+    running any tagger again.
+
+    data/auto_speaker_identification.repere only contains SID decisions,
+    hence SID scores are 1 for the selected model and 0 for the others.
+
+    SID and M3 + SID rows use the same frame-wise scoring as fused rows
+    (see framewise.py), where anonymous groundtruth persons are left out as
+    in EstimatedGlobalErrorRate: the SID row reproduces Table 4.
+
+    Fused settings are selected on the very same test videos they are
+    reported on: they are optimistic and only show what score-level fusion
+    can achieve.
+
+"""
+
+# =============================================================================
+# == CHECK PYANNOTE VERSION ===================================================
+# =============================================================================
+
+DESIGNED_FOR_PYANNOTE_VERSION = "0.2.2"
+
+# check PyAnnote is available
+try:
+    import pyannote
+except Exception, e:
+    raise ImportError("This script relies on PyAnnote %s available at "
+                      "http://packages.python.org/PyAnnote" % \
+                       DESIGNED_FOR_PYANNOTE_VERSION)
+
+# check PyAnnote version
+try:
+    assert(pyannote.__version__ >= DESIGNED_FOR_PYANNOTE_VERSION)
+except Exception, e:
+    raise ImportError("This script requires PyAnnote %s "
+                      "(you have: %s)." % (DESIGNED_FOR_PYANNOTE_VERSION, \
+                                           pyannote.__version__))
+
+# =============================================================================
+# == IMPORTS ==================================================================
+# =============================================================================
+
+from argparse import ArgumentParser
+import numpy as np
+
+# .uem, .mdtm and .repere files parsers
+from pyannote.parser import UEMParser, MDTMParser, REPEREParser
+
+from pyannote.algorithm.tagging import ArgMaxTagger, \
+                                       ConservativeDirectTagger
+from pyannote.base.matrix import CoTFIDF
+
+# frame-wise counts and score-level fusion
+from framewise import FrameCounts, segments, rates
+from fusion import evidence, decide, evaluate
+
+# used to display a progress bar
+from progressbar import ProgressBar, Bar
+# used to pretty-print tables
+from prettytable import PrettyTable
+
+parser = ArgumentParser(description="Score-level fusion of SID and "
+                                    "overlaid names.")
+parser.add_argument('--direct', type=float, nargs='+', \
+                    default=[0., .5, 1., 2.], \
+                    help="weights of direct co-occurrence "
+                         "(default: %(default)s)")
+parser.add_argument('--one-to-many', type=float, nargs='+', \
+                    default=[0., .5, 1., 2.], \
+                    help="weights of one-to-many co-occurrence "
+                         "(default: %(default)s)")
+parser.add_argument('--threshold', type=float, nargs='+', \
+                    default=[0., .1, .25, .5, 1.], \
+                    help="decision thresholds (default: %(default)s)")
+parser.add_argument('--top', type=int, default=10, \
+                    help="number of best settings to display "
+                         "(default: %(default)s)")
+args = parser.parse_args()
+
+# =============================================================================
+# == LOAD DATA ================================================================
+# =============================================================================
+
+# list of test videos
+f = open("data/videos.txt", "r")
+videos = [line.strip() for line in f.readlines()]
+f.close()
+
+# annotated frames
+annotated_frames = UEMParser("data/annotated_frames.uem")
+
+# list of anchors
+f = open("data/anchors.txt", "r")
+anchors = [line.strip() for line in f.readlines()]
+f.close()
+
+# list of speaker models
+f = open("data/sid_models.lst", "r")
+models = [line.strip() for line in f.readlines()]
+f.close()
+
+# manual speaker identification
+manual_speaker_identification = MDTMParser("data/manual_speaker.mdtm", \
+                                           multitrack=True)
+
+# automatic speaker identification
+auto_speaker_identification = \
+                     REPEREParser("data/auto_speaker_identification.repere", \
+                                  multitrack=True, confidence=False)
+
+# overlaid name detection output
+auto_overlaid_names = REPEREParser("data/auto_overlaid_names.repere", \
+                                   multitrack=True, confidence=False)
+
+# 'M3 + SID' as in run.py
+one_to_many = ArgMaxTagger(cost=CoTFIDF)
+direct = ConservativeDirectTagger()
+combo = lambda on, sd, sid : direct(on, one_to_many(on, sid))
+
+# =============================================================================
+# == FUSION ===================================================================
+# =============================================================================
+
+# (SID, direct, one-to-many) weightings
+weights = np.array([(1., d, o) for d in args.direct \
+                               for o in args.one_to_many], dtype=float)
+thresholds = np.array(args.threshold, dtype=float)
+W, T = len(weights), len(thresholds)
+
+# counts[speakers] is a (weightings x thresholds x 4) array
+# baseline[speakers][method] is a (4, ) array
+counts = {}
+baseline = {}
+for speakers in ['All', 'No anchor']:
+    counts[speakers] = np.zeros((W, T, 4), dtype=int)
+    baseline[speakers] = {'SID': np.zeros((4, ), dtype=int), \
+                          'M3 + SID': np.zeros((4, ), dtype=int)}
+
+# initialize progress bar
+pb = ProgressBar(term_width=69, maxval=len(videos), \
+                 widgets=['Fusion: ', Bar()]).start()
+
+for v, video in enumerate(videos):
+
+    # extract overlaid name detection for this video
+    on = auto_overlaid_names.annotation(video, 'written')
+
+    # extract automatic speaker identification for this video
+    sid = auto_speaker_identification.annotation(video, 'speaker')
+
+    # extract groundtruth for this video
+    msi = manual_speaker_identification.annotation(video, 'speaker')
+
+    # all frames and frames without anchors in groundtruth
+    af = annotated_frames.timeline(video)
+    af_noanchor = af(msi(anchors).timeline.gaps(af.extent()), mode='loose')
+    frames = {'All': [(frame.start, frame.end) for frame in af], \
+              'No anchor': [(frame.start, frame.end) \
+                            for frame in af_noanchor]}
+
+    # names that can be given: speaker models and detected overlaid names
+    vocabulary = sorted(set(models) | set(on.labels()))
+    vocabulary = {name: n for n, name in enumerate(vocabulary)}
+
+    # SID segments, all with score 1
+    sid_segments = [(start, end, label, 1.) \
+                    for start, end, label in segments(sid)]
+    E = evidence(sid_segments, segments(on), vocabulary)
+    reference = segments(msi)
+
+    # all weightings and thresholds at once
+    labels, named = decide(E, weights, thresholds)
+
+    # SID alone
+    sid_labels, sid_named = decide(E, [(1., 0., 0.)], [0.])
+
+    # hard-decision M3 + SID
+    s = combo(on, None, sid)
+
+    for speakers, annotated in [('All', af), ('No anchor', af_noanchor)]:
+        counts[speakers] += evaluate(sid_segments, labels, named, \
+                                     reference, frames[speakers], vocabulary)
+        baseline[speakers]['SID'] += evaluate(sid_segments, sid_labels, \
+                                              sid_named, reference, \
+                                              frames[speakers], \
+                                              vocabulary)[0, 0]
+        baseline[speakers]['M3 + SID'] += FrameCounts(msi, s, \
+                                                      annotated=annotated)()
+
+    pb.update(v+1)
+
+pb.finish()
+
+# =============================================================================
+# == RESULTS ==================================================================
+# =============================================================================
+
+for speakers in ['All', 'No anchor']:
+
+    table = PrettyTable(["Speakers", "Fusion", "Direct", "One-to-many", \
+                         "Threshold", "EGER", "Precision", "Recall", \
+                         "F1-Measure"])
+    table.float_format = "1.3"
+
+    # hard-decision baselines
+    for method in ['SID', 'M3 + SID']:
+        eger, precision, recall, f_measure = rates(baseline[speakers][method])
+        table.add_row([speakers, method, '', '', '', \
+                       eger, precision, recall, f_measure])
+
+    # best settings (selected on the test set)
+    eger, precision, recall, f_measure = rates(counts[speakers])
+    best = np.argsort(eger, axis=None, kind='mergesort')[:args.top]
+    for w, t in zip(*np.unravel_index(best, eger.shape)):
+        _, d, o = weights[w]
+        table.add_row([speakers, 'tuned on test', d, o, thresholds[t], \
+                       eger[w, t], precision[w, t], recall[w, t], \
+                       f_measure[w, t]])
+
+    print table
+    print "Score-level fusion of SID and overlaid names (%s), full cond." % \
+          speakers
+    print "Fused settings are selected on the test set (optimistic)."
+    print
@@ -0,0 +1,290 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2012 Herve BREDIN (bredin@limsi.fr)
+
+"""
+   Unsupervised Speaker Identification using Overlaid Texts in TV Broadcast
+
+              Johann Poignant, Hervé Bredin, Viet Bac Le,
+           Laurent Besacier, Claude Barras and Georges Quénot.
+
+    This script relies on PyAnnote available at
+    http://packages.python.org/PyAnnote
+
+    Table 5 compares two conditions only (standard condition and full video).
+    This script shows how name propagation performance varies along the
+    broadcast (first N minutes, rolling windows and per show)::
+
+        >>> python run_windows.py --method M3 --width 10 --step 5
+
+    Names are propagated once per video (full condition) and per-frame
+    counts are accumulated once, so that each time window is evaluated in
+    constant time. Full video rows of Tables 3 and 4 are printed first, as a
+    sanity check of frame-wise counts (see regression.py).
+
+"""
+
+# =============================================================================
+# == CHECK PYANNOTE VERSION ===================================================
+# =============================================================================
+
+DESIGNED_FOR_PYANNOTE_VERSION = "0.2.2"
+
+# check PyAnnote is available
+try:
+    import pyannote
+except Exception, e:
+    raise ImportError("This script relies on PyAnnote %s available at "
+                      "http://packages.python.org/PyAnnote" % \
+                       DESIGNED_FOR_PYANNOTE_VERSION)
+
+# check PyAnnote version
+try:
+    assert(pyannote.__version__ >= DESIGNED_FOR_PYANNOTE_VERSION)
+except Exception, e:
+    raise ImportError("This script requires PyAnnote %s "
+                      "(you have: %s)." % (DESIGNED_FOR_PYANNOTE_VERSION, \
+                                           pyannote.__version__))
+
+# =============================================================================
+# == IMPORTS ==================================================================
+# =============================================================================
+
+from argparse import ArgumentParser
+import numpy as np
+
+# .uem, .mdtm and .repere files parsers
+from pyannote.parser import UEMParser, MDTMParser, REPEREParser
+
+from pyannote.algorithm.tagging import HungarianTagger, \
+                                       ArgMaxTagger, \
+                                       ConservativeDirectTagger
+from pyannote.base.matrix import Cooccurrence, CoTFIDF
+
+# cumulative per-frame counts
+from framewise import FrameCounts, rates
+
+# used to display a progress bar
+from progressbar import ProgressBar, Bar
+# used to pretty-print tables
+from prettytable import PrettyTable
+
+METHODS = ['SID', 'M1', 'M2', 'M3', 'M3 + SID']
+
+parser = ArgumentParser(description="Evaluate name propagation "
+                                    "on time windows.")
+parser.add_argument('--method', action='append', choices=METHODS, \
+                    help="propagation method (default: M3)")
+parser.add_argument('--first', type=float, nargs='+', \
+                    default=[5., 10., 20., 30., 60.], \
+                    help="evaluate first N minutes (default: %(default)s)")
+parser.add_argument('--width', type=float, default=10., \
+                    help="rolling window width in minutes "
+                         "(default: %(default)s)")
+parser.add_argument('--step', type=float, default=5., \
+                    help="rolling window step in minutes "
+                         "(default: %(default)s)")
+args = parser.parse_args()
+methods = args.method if args.method else ['M3']
+
+# =============================================================================
+# == LOAD DATA ================================================================
+# =============================================================================
+
+# list of test videos
+f = open("data/videos.txt", "r")
+videos = [line.strip() for line in f.readlines()]
+f.close()
+
+# show of each video (e.g. BFMTV_BFMStory)
+show = {video: "_".join(video.split("_")[:2]) for video in videos}
+
+# annotated frames
+annotated_frames = UEMParser("data/annotated_frames.uem")
+
+# list of anchors
+f = open("data/anchors.txt", "r")
+anchors = [line.strip() for line in f.readlines()]
+f.close()
+
+# manual speaker identification
+manual_speaker_identification = MDTMParser("data/manual_speaker.mdtm", \
+                                           multitrack=True)
+
+# automatic speaker diarization
+auto_speaker_diarization = MDTMParser("data/auto_speaker_diarization.mdtm", \
+                                      multitrack=True)
+
+# automatic speaker identification
+auto_speaker_identification = \
+                     REPEREParser("data/auto_speaker_identification.repere", \
+                                  multitrack=True, confidence=False)
+
+# overlaid name detection output
+auto_overlaid_names = REPEREParser("data/auto_overlaid_names.repere", \
+                                   multitrack=True, confidence=False)
+
+# ----------------------------------------------
+# INITIALIZE NAME PROPAGATION ALGORITHMS
+# as described in Section "3. Name Propagation"
+# ----------------------------------------------
+
+one_to_one = HungarianTagger(cost=Cooccurrence)
+one_to_many = ArgMaxTagger(cost=CoTFIDF)
+direct = ConservativeDirectTagger()
+
+M1 = lambda on, sd, sid : one_to_one(on, sd)
+M2 = lambda on, sd, sid : direct(on, one_to_one(on, sd))
+M3 = lambda on, sd, sid : direct(on, one_to_many(on, sd))
+
+SID = lambda on, sd, sid : sid
+combo = lambda on, sd, sid : direct(on, one_to_many(on, sid))
+
+propagation_algorithms = {'SID' : SID,
+                          'M1': M1, 'M2': M2, 'M3': M3,
+                          'M3 + SID' : combo}
+
+# =============================================================================
+# == CUMULATIVE PER-FRAME COUNTS ==============================================
+# =============================================================================
+
+# counts[speakers][method][video]
+counts = {'All': {}, 'No anchor': {}}
+for speakers in counts:
+    for method in methods:
+        counts[speakers][method] = {}
+
+# initialize progress bar
+pb = ProgressBar(term_width=69, maxval=len(videos)*len(methods), \
+                 widgets=['Counts: ', Bar()]).start()
+
+for v, video in enumerate(videos):
+
+    # extract automatic speaker diarization for this video
+    sd = auto_speaker_diarization.annotation(video, 'speaker')
+    # anonymize labels (Unknown001, Unknown002, etc.)
+    sd = sd.anonymize()
+
+    # extract overlaid name detection for this video
+    on = auto_overlaid_names.annotation(video, 'written')
+
+    # extract automatic speaker identification for this video
+    sid = auto_speaker_identification.annotation(video, 'speaker')
+
+    # extract groundtruth for this video
+    msi = manual_speaker_identification.annotation(video, 'speaker')
+
+    # all frames and frames without anchors in groundtruth
+    af = annotated_frames.timeline(video)
+    af_noanchor = af(msi(anchors).timeline.gaps(af.extent()), mode='loose')
+
+    for m, method in enumerate(methods):
+
+        # propagate name
+        s = propagation_algorithms[method](on, sd, sid)
+
+        counts['All'][method][video] = \
+                                    FrameCounts(msi, s, annotated=af)
+        counts['No anchor'][method][video] = \
+                                    FrameCounts(msi, s, annotated=af_noanchor)
+
+        pb.update(v*len(methods)+(m+1))
+
+pb.finish()
+
+# =============================================================================
+# == TIME WINDOWS =============================================================
+# =============================================================================
+
+def add_rows(table, speakers, method, window, per_video):
+    """Sum counts over videos and add one row per window to table
+
+    per_video : dict
+        per_video[video] is a (N x 4) array of counts for N windows
+    """
+    total = np.sum(per_video.values(), axis=0)
+    for w, row in enumerate(np.atleast_2d(total)):
+        eger, precision, recall, f_measure = rates(row)
+        table.add_row([speakers, method, window[w], eger, \
+                       precision, recall, f_measure])
+
+header = ["Speakers", "Propagation", "Window", "EGER", \
+          "Precision", "Recall", "F1-Measure"]
+
+# --- full video
+# same rows as Tables 3 and 4 (used by regression.py to check that
+# frame-wise counts reproduce EstimatedGlobalErrorRate)
+
+for number, rows, caption in [ \
+    (3, ['M1', 'M2', 'M3'], "Name propagation performance, full cond."), \
+    (4, ['SID', 'M3', 'M3 + SID'], "Supervised (SID) vs. unsupervised (M3) "
+                                   "speaker identification and their "
+                                   "combination (M3+SID), full cond.")]:
+    rows = [method for method in rows if method in methods]
+    if not rows:
+        continue
+    table = PrettyTable(["Speakers", "Propagation", "EGER", \
+                         "Precision", "Recall", "F1-Measure"])
+    table.float_format = "1.3"
+    for speakers in ['All', 'No anchor']:
+        for method in rows:
+            total = np.sum([counts[speakers][method][video]() \
+                            for video in videos], axis=0)
+            table.add_row([speakers, method] + list(rates(total)))
+    print table
+    print "Table %d: %s (frame-wise counts)" % (number, caption)
+    print
+
+# --- first N minutes
+
+table = PrettyTable(header)
+table.float_format = "1.3"
+ends = 60. * np.array(args.first)
+starts = np.zeros(ends.shape)
+window = ["first %g min" % first for first in args.first]
+for speakers in ['All', 'No anchor']:
+    for method in methods:
+        per_video = {video: counts[speakers][method][video].windows(starts, \
+                                                                    ends) \
+                     for video in videos}
+        add_rows(table, speakers, method, window, per_video)
+print table
+print "Name propagation performance on the first N minutes, full cond."
+print
+
+# --- rolling windows
+
+table = PrettyTable(header)
+table.float_format = "1.3"
+duration = max([counts['All'][methods[0]][video].times[-1] \
+                for video in videos \
+                if len(counts['All'][methods[0]][video].times)])
+starts = 60. * np.arange(0., duration / 60., args.step)
+ends = starts + 60. * args.width
+window = ["%g-%g min" % (start/60., end/60.) \
+          for start, end in zip(starts, ends)]
+for speakers in ['All', 'No anchor']:
+    for method in methods:
+        per_video = {video: counts[speakers][method][video].windows(starts, \
+                                                                    ends) \
+                     for video in videos}
+        add_rows(table, speakers, method, window, per_video)
+print table
+print "Name propagation performance on rolling %g-minute windows, " \
+      "full cond." % args.width
+print
+
+# --- per show
+
+table = PrettyTable(header)
+table.float_format = "1.3"
+for speakers in ['All', 'No anchor']:
+    for method in methods:
+        for name in sorted(set(show.values())):
+            per_video = {video: counts[speakers][method][video]() \
+                         for video in videos if show[video] == name}
+            add_rows(table, speakers, method, [name], per_video)
+print table
+print "Name propagation performance per show, full cond."
+print
@@ -0,0 +1,294 @@
+#!/usr/bin/env python
+# encoding: utf-8
+
+# Copyright 2012 Herve BREDIN (bredin@limsi.fr)
+
+"""
+   Unsupervised Speaker Identification using Overlaid Texts in TV Broadcast
+
+              Johann Poignant, Hervé Bredin, Viet Bac Le,
+           Laurent Besacier, Claude Barras and Georges Quénot.
+
+    This script relies on PyAnnote available at
+    http://packages.python.org/PyAnnote
+
+    It loads data/ once, and serves name propagation and evaluation
+    requests on localhost::
+
+        >>> python server.py --port 8000 --workers 4
+
+    Names are propagated and per-frame counts are accumulated for every
+    method, condition and video at start-up, by a pool of worker processes
+    which inherit the already parsed corpus. Requests are then handled
+    concurrently, with prefix-sum lookups only::
+
+        $ curl "http://localhost:8000/evaluate?method=M3&condition=standard"
+        $ curl "http://localhost:8000/evaluate?method=M1&video=LCP_PileEtFace_2011-09-15_185900"
+        $ curl "http://localhost:8000/evaluate?method=M2&start=0&end=600"
+        $ curl "http://localhost:8000/evaluate?method=M3+%2B+SID"
+
+    Parameters are
+        method    : one of SID, M1, M2, M3 or M3 + SID (default: M3)
+                    '+' must be escaped as %2B in query strings (M3+%2B+SID),
+                    though M3+SID is also accepted
+        condition : 'full' (Tables 3 & 4) or 'standard' (Table 5)
+                    (default: full)
+        video     : video to evaluate, can be repeated (default: all videos)
+        start/end : only evaluate frames in this time window (in seconds)
+
+    Answer is a JSON object with EGER, precision, recall and F1-measure
+    for all frames ('All') and frames without anchors ('No anchor').
+
+    `python regression.py --mode server` starts this server on localhost and
+    checks that its answers reproduce Table 5 of OUTPUT.txt.
+
+"""
+
+# =============================================================================
+# == CHECK PYANNOTE VERSION ===================================================
+# =============================================================================
+
+DESIGNED_FOR_PYANNOTE_VERSION = "0.2.2"
+
+# check PyAnnote is available
+try:
+    import pyannote
+except Exception, e:
+    raise ImportError("This script relies on PyAnnote %s available at "
+                      "http://packages.python.org/PyAnnote" % \
+                       DESIGNED_FOR_PYANNOTE_VERSION)
+
+# check PyAnnote version
+try:
+    assert(pyannote.__version__ >= DESIGNED_FOR_PYANNOTE_VERSION)
+except Exception, e:
+    raise ImportError("This script requires PyAnnote %s "
+                      "(you have: %s)." % (DESIGNED_FOR_PYANNOTE_VERSION, \
+                                           pyannote.__version__))
+
+# =============================================================================
+# == IMPORTS ==================================================================
+# =============================================================================
+
+import json
+import urlparse
+from argparse import ArgumentParser
+from multiprocessing import Pool
+from SocketServer import ThreadingMixIn
+from BaseHTTPServer import HTTPServer, BaseHTTPRequestHandler
+
+import numpy as np
+
+# .uem, .mdtm and .repere files parsers
+from pyannote.parser import UEMParser, MDTMParser, REPEREParser
+
+from pyannote.algorithm.tagging import HungarianTagger, \
+                                       ArgMaxTagger, \
+                                       ConservativeDirectTagger
+from pyannote.base.matrix import Cooccurrence, CoTFIDF
+
+# cumulative per-frame counts
+from framewise import FrameCounts, rates
+
+parser = ArgumentParser(description="Serve name propagation and "
+                                    "evaluation requests on localhost.")
+parser.add_argument('--host', default='127.0.0.1', \
+                    help="address to bind (default: %(default)s)")
+parser.add_argument('--port', type=int, default=8000, \
+                    help="port to listen on (default: %(default)s)")
+parser.add_argument('--workers', type=int, default=None, \
+                    help="number of worker processes "
+                         "(default: number of CPUs)")
+args = parser.parse_args()
+
+# =============================================================================
+# == LOAD DATA ================================================================
+# =============================================================================
+
+# list of test videos
+f = open("data/videos.txt", "r")
+videos = [line.strip() for line in f.readlines()]
+f.close()
+
+# standard condition
+standard_condition = UEMParser("data/standard_condition.uem")
+
+# annotated frames
+annotated_frames = UEMParser("data/annotated_frames.uem")
+
+# list of anchors
+f = open("data/anchors.txt", "r")
+anchors = [line.strip() for line in f.readlines()]
+f.close()
+
+# manual speaker identification
+manual_speaker_identification = MDTMParser("data/manual_speaker.mdtm", \
+                                           multitrack=True)
+
+# automatic speaker diarization
+auto_speaker_diarization = MDTMParser("data/auto_speaker_diarization.mdtm", \
+                                      multitrack=True)
+
+# automatic speaker identification
+auto_speaker_identification = \
+                     REPEREParser("data/auto_speaker_identification.repere", \
+                                  multitrack=True, confidence=False)
+
+# overlaid name detection output
+auto_overlaid_names = REPEREParser("data/auto_overlaid_names.repere", \
+                                   multitrack=True, confidence=False)
+
+# ----------------------------------------------
+# INITIALIZE NAME PROPAGATION ALGORITHMS
+# as described in Section "3. Name Propagation"
+# ----------------------------------------------
+
+one_to_one = HungarianTagger(cost=Cooccurrence)
+one_to_many = ArgMaxTagger(cost=CoTFIDF)
+direct = ConservativeDirectTagger()
+
+M1 = lambda on, sd, sid : one_to_one(on, sd)
+M2 = lambda on, sd, sid : direct(on, one_to_one(on, sd))
+M3 = lambda on, sd, sid : direct(on, one_to_many(on, sd))
+
+SID = lambda on, sd, sid : sid
+combo = lambda on, sd, sid : direct(on, one_to_many(on, sid))
+
+propagation_algorithms = {'SID' : SID,
+                          'M1': M1, 'M2': M2, 'M3': M3,
+                          'M3 + SID' : combo}
+
+# '+' is decoded as a space in query strings (M3+SID gives 'M3 SID')
+ALIASES = {'M3 SID': 'M3 + SID', 'M3+SID': 'M3 + SID'}
+
+CONDITIONS = ['full', 'standard']
+
+# =============================================================================
+# == WARM CACHES ==============================================================
+# =============================================================================
+
+# inputs[condition][video] = (on, sd, sid, msi, af, af_noanchor)
+inputs = {condition: {} for condition in CONDITIONS}
+
+for video in videos:
+
+    # extract groundtruth for this video
+    msi = manual_speaker_identification.annotation(video, 'speaker')
+
+    # all frames and frames without anchors in groundtruth
+    af = annotated_frames.timeline(video)
+    af_noanchor = af(msi(anchors).timeline.gaps(af.extent()), mode='loose')
+
+    # extract automatic speaker diarization, overlaid name detection
+    # and automatic speaker identification for this video
+    sd = auto_speaker_diarization.annotation(video, 'speaker')
+    on = auto_overlaid_names.annotation(video, 'written')
+    sid = auto_speaker_identification.annotation(video, 'speaker')
+
+    # full condition (Tables 3 & 4)
+    inputs['full'][video] = (on, sd.anonymize(), sid, msi, af, af_noanchor)
+
+    # standard condition (Table 5)
+    sc = standard_condition.timeline(video)
+    inputs['standard'][video] = (on(sc, mode='loose'), \
+                                 sd(sc, mode='loose').anonymize(), \
+                                 sid(sc, mode='loose'), \
+                                 msi, af, af_noanchor)
+
+def build_counts(key):
+    """Propagate names and accumulate per-frame counts (run by workers)"""
+    condition, method, video = key
+    on, sd, sid, msi, af, af_noanchor = inputs[condition][video]
+    s = propagation_algorithms[method](on, sd, sid)
+    return (FrameCounts(msi, s, annotated=af), \
+            FrameCounts(msi, s, annotated=af_noanchor))
+
+# counts[condition, method, video] = (FrameCounts, FrameCounts)
+# for all frames and frames without anchors.
+# Every key is computed once, in parallel, before serving: workers are
+# forked here (so that they inherit the parsed corpus) and send back
+# FrameCounts (plain numpy arrays) to this process, which then answers
+# each request with prefix-sum lookups only.
+keys = [(condition, method, video) for condition in CONDITIONS \
+                                   for method in propagation_algorithms \
+                                   for video in videos]
+print "Propagating names (%d videos x %d methods x %d conditions)..." % \
+      (len(videos), len(propagation_algorithms), len(CONDITIONS))
+pool = Pool(processes=args.workers)
+counts = dict(zip(keys, pool.map(build_counts, keys)))
+pool.close()
+pool.join()
+
+# =============================================================================
+# == SERVER ===================================================================
+# =============================================================================
+
+class ThreadingHTTPServer(ThreadingMixIn, HTTPServer):
+    # one thread per request (counts are read-only once serving)
+    daemon_threads = True
+
+class RequestHandler(BaseHTTPRequestHandler):
+
+    def _answer(self, code, answer):
+        body = json.dumps(answer, indent=2, sort_keys=True)
+        self.send_response(code)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+
+        url = urlparse.urlparse(self.path)
+        if url.path != '/evaluate':
+            self._answer(404, {'error': "Unknown path %s." % url.path})
+            return
+
+        query = urlparse.parse_qs(url.query)
+        method = query.get('method', ['M3'])[0]
+        method = ALIASES.get(method, method)
+        condition = query.get('condition', ['full'])[0]
+        # each video is counted once, in order of first appearance
+        selected = query.get('video', videos)
+        selected = [video for v, video in enumerate(selected) \
+                    if video not in selected[:v]]
+        try:
+            start = float(query['start'][0]) if 'start' in query else None
+            end = float(query['end'][0]) if 'end' in query else None
+        except ValueError:
+            self._answer(400, {'error': "start and end must be numbers."})
+            return
+        if start is not None and end is not None and start >= end:
+            self._answer(400, {'error': "start must be smaller than end."})
+            return
+
+        if method not in propagation_algorithms:
+            self._answer(400, {'error': "Unknown method %s." % method})
+            return
+        if condition not in CONDITIONS:
+            self._answer(400, {'error': "Unknown condition %s." % condition})
+            return
+        unknown = [video for video in selected if video not in videos]
+        if unknown:
+            self._answer(400, {'error': "Unknown video(s) %s." % \
+                                        ", ".join(unknown)})
+            return
+
+        answer = {'method': method, 'condition': condition, \
+                  'videos': selected, 'start': start, 'end': end}
+        for s, speakers in enumerate(['All', 'No anchor']):
+            total = np.sum([counts[condition, method, video][s](start, end) \
+                            for video in selected], axis=0)
+            eger, precision, recall, f_measure = rates(total)
+            answer[speakers] = {'EGER': eger, 'Precision': precision, \
+                                'Recall': recall, 'F1-Measure': f_measure}
+        self._answer(200, answer)
+
+server = ThreadingHTTPServer((args.host, args.port), RequestHandler)
+print "Serving on http://%s:%d/evaluate" % (args.host, args.port)
+try:
+    server.serve_forever()
+except KeyboardInterrupt:
+    pass
+finally:
+    server.server_close()